@@ -5,26 +5,45 @@ This is the main entry point for the LED Wall Client application.
 """
 import os
 import sys
+import queue
+import atexit
 import signal
 import logging
+import logging.handlers
 import time
+import threading
 from modules.config import ConfigManager
 from modules.player import MediaPlayer
-from modules.network import ServerConnection
+from modules.network import ServerConnection, DOWNLOAD_FOLDER
 from modules.ui import UIManager
 
 # Setup logging with absolute path
 script_dir = os.path.dirname(os.path.abspath(__file__))
 log_file = os.path.join(script_dir, "client.log")
 
+# Format and write log records on a background thread so logging calls
+# never block on file/console I/O
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [
+    logging.FileHandler(log_file),
+    logging.StreamHandler(sys.stdout)
+]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+# SimpleQueue.put is reentrant, so logging from a signal handler can't deadlock
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# The listener's handlers do the real formatting; only merge args here
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter('%(message)s'))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[queue_handler]
 )
+logging.getLogger("urllib3").setLevel(logging.WARNING)
 logger = logging.getLogger("led_client")
 
 class LEDWallClient:
@@ -36,6 +55,8 @@ class LEDWallClient:
     def __init__(self):
         """Initialize the LED Wall Client"""
         self.running = True
+        self._shutdown = threading.Event()
+        self._cleaned = False
         
         # Set static instance for global access
         LEDWallClient.instance = self
@@ -70,10 +91,10 @@ class LEDWallClient:
     
     def handle_exit_signal(self, signum, frame):
         """Handle exit signals gracefully"""
-        logger.info(f"Received signal {signum}, shutting down...")
+        logger.info("Received signal %s, shutting down...", signum)
         self.running = False
-        self.cleanup()
-        sys.exit(0)
+        # Wake the main loop; run() performs cleanup on its way out
+        self._shutdown.set()
     
     def handle_content_update(self, content_id, content_info):
         """Handle content updates from the server
@@ -85,23 +106,23 @@ class LEDWallClient:
         Returns:
             bool: True if content was played successfully
         """
-        logger.info(f"Content update received: {content_id}")
+        logger.info("Content update received: %s", content_id)
         
         # Skip if already playing this content
         if content_id == self.current_content:
-            logger.info(f"Already playing content {content_id}")
+            logger.info("Already playing content %s", content_id)
             return True
         
         # Stop current playback
         self.player.stop()
         
-        # Start playing the new content (use absolute path)
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        downloads_dir = os.path.join(script_dir, "downloads")
-        file_path = os.path.join(downloads_dir, content_info['filename'])
-        if not os.path.exists(file_path):
-            logger.error(f"Content file does not exist: {file_path}")
-            return False
+        # Start playing the new content, reusing the path resolved at download time
+        file_path = content_info.get('_local_path')
+        if not file_path:
+            file_path = os.path.join(DOWNLOAD_FOLDER, content_info['filename'])
+            if not os.path.exists(file_path):
+                logger.error("Content file does not exist: %s", file_path)
+                return False
             
         success = self.player.play(
             file_path, 
@@ -116,7 +137,7 @@ class LEDWallClient:
             self.server.send_status_update('playing', content_id)
             return True
         else:
-            logger.error(f"Failed to play content: {content_id}")
+            logger.error("Failed to play content: %s", content_id)
             # Send error status to server
             self.server.send_status_update('error', content_id, 'Failed to play content')
             return False
@@ -132,31 +153,29 @@ class LEDWallClient:
         
         # Only handle if still current content
         if content_id != self.current_content:
-            logger.info(f"Playback ended for old content {content_id}, ignoring")
+            logger.info("Playback ended for old content %s, ignoring", content_id)
             return
             
         if exit_code != 0:
-            logger.warning(f"Playback ended unexpectedly with code {exit_code}")
+            logger.warning("Playback ended unexpectedly with code %s", exit_code)
             # Restart with delay to prevent rapid restart loops
             time.sleep(2)
             
             # Try to restart playback (use absolute path)
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            downloads_dir = os.path.join(script_dir, "downloads")
-            file_path = os.path.join(downloads_dir, content_info['filename'])
+            file_path = content_info.get('_local_path') or os.path.join(DOWNLOAD_FOLDER, content_info['filename'])
             if os.path.exists(file_path):
-                logger.info(f"Restarting playback of {content_id}")
+                logger.info("Restarting playback of %s", content_id)
                 self.player.play(
                     file_path,
                     content_info,
                     callback=self.handle_playback_ended
                 )
             else:
-                logger.error(f"Content file no longer exists: {file_path}")
+                logger.error("Content file no longer exists: %s", file_path)
                 # Clear current content so it can be reassigned
                 self.current_content = None
         else:
-            logger.info(f"Playback ended normally for {content_id}")
+            logger.info("Playback ended normally for %s", content_id)
             # Send stopped status to server
             self.server.send_status_update('stopped', content_id)
             # Clear current content
@@ -168,7 +187,7 @@ class LEDWallClient:
         Args:
             prices: List of price strings
         """
-        logger.info(f"Price update received: {prices}")
+        logger.info("Price update received: %s", prices)
 
         # Stop any current playback
         self.player.stop()
@@ -180,11 +199,11 @@ class LEDWallClient:
         )
 
         if success:
-            logger.info(f"Successfully started price display: {prices}")
+            logger.info("Successfully started price display: %s", prices)
             # Send status update to server
             self.server.send_status_update('playing', 'prices', f'Displaying prices: {prices}')
         else:
-            logger.error(f"Failed to display prices: {prices}")
+            logger.error("Failed to display prices: %s", prices)
             # Send error status to server
             self.server.send_status_update('error', 'prices', f'Failed to display prices: {prices}')
 
@@ -195,16 +214,20 @@ class LEDWallClient:
             prices: The prices that were being displayed
             exit_code: Exit code from the display process
         """
-        logger.info(f"Price display ended for {prices} with exit code {exit_code}")
+        logger.info("Price display ended for %s with exit code %s", prices, exit_code)
 
         if exit_code != 0:
-            logger.warning(f"Price display ended unexpectedly with code {exit_code}")
+            logger.warning("Price display ended unexpectedly with code %s", exit_code)
             # Could restart display here if needed
         else:
-            logger.info(f"Price display ended normally for {prices}")
+            logger.info("Price display ended normally for %s", prices)
     
     def cleanup(self):
-        """Clean up resources before exit"""
+        """Clean up resources before exit (safe to call more than once)"""
+        if self._cleaned:
+            return
+        self._cleaned = True
+        
         logger.info("Cleaning up resources...")
         if hasattr(self, 'player'):
             self.player.stop()
@@ -227,11 +250,12 @@ class LEDWallClient:
             logger.warning("Could not connect to server via WebSocket, falling back to polling")
         
         try:
-            # Main loop
-            while self.running:
-                if not self.server.is_connected():
-                    self.server.reconnect()
-                time.sleep(1)
+            # Reconnects and polling are driven by the server connection's
+            # own timers, so just block until shutdown. Windows only delivers
+            # Ctrl+C between waits, so wake up periodically there.
+            wait_timeout = 1 if self.player.is_windows else None
+            while self.running and not self._shutdown.wait(wait_timeout):
+                pass
         except KeyboardInterrupt:
             logger.info("Client stopped by user")
         finally:
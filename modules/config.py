@@ -3,13 +3,31 @@ Configuration Manager for LED Wall Client
 Handles loading, saving, and accessing configuration values.
 """
 import os
-import json
 import socket
+import hashlib
 import logging
 import platform
+import functools
+from .jsonutil import loads as _loads, dumps as _dumps
 
 logger = logging.getLogger("led_client.config")
 
+RPI_MODEL_FILE = '/sys/firmware/devicetree/base/model'
+
+@functools.lru_cache(maxsize=1)
+def _detect_raspberry_pi():
+    """Detect if running on a Raspberry Pi (cached for the process lifetime)"""
+    # Raspberry Pi boards are always ARM, so skip the file check elsewhere
+    machine = platform.machine().lower()
+    if not (machine.startswith('arm') or machine.startswith('aarch64')):
+        return False
+    
+    try:
+        with open(RPI_MODEL_FILE, 'rb') as f:
+            return b'raspberry pi' in f.read().lower()
+    except OSError:
+        return False
+
 class ConfigManager:
     """Manages client configuration settings"""
     
@@ -24,55 +42,79 @@ class ConfigManager:
         self.is_windows = platform.system() == "Windows"
         self.is_raspberry_pi = self._detect_raspberry_pi()
         self.config = self.load()
+        self._saved_hash = self._hash_config()
         
         # Ensure critical settings are present
         self._ensure_defaults()
+        
+        # Cache frequently accessed values as plain attributes
+        self._server_url = self.config.get('server_url', self.DEFAULT_SERVER_URL)
+        self._width = self.config.get('width', self.DEFAULT_WIDTH)
+        self._height = self.config.get('height', self.DEFAULT_HEIGHT)
+        self._name = self.config.get('name') or socket.gethostname()
+        self._client_id = self.config.get('client_id')
     
     def _detect_raspberry_pi(self):
         """Detect if running on a Raspberry Pi"""
-        try:
-            return os.path.exists('/sys/firmware/devicetree/base/model') and 'raspberry pi' in open('/sys/firmware/devicetree/base/model', 'r').read().lower()
-        except:
-            return False
+        return _detect_raspberry_pi()
     
     def _ensure_defaults(self):
         """Ensure all required configuration values are present"""
-        if 'width' not in self.config:
+        dirty = False
+        
+        # Always set the resolution to the fixed value
+        if self.config.get('width') != self.DEFAULT_WIDTH:
             self.config['width'] = self.DEFAULT_WIDTH
-        if 'height' not in self.config:
+            dirty = True
+        if self.config.get('height') != self.DEFAULT_HEIGHT:
             self.config['height'] = self.DEFAULT_HEIGHT
+            dirty = True
         if 'server_url' not in self.config:
             self.config['server_url'] = self.DEFAULT_SERVER_URL
+            dirty = True
         if 'name' not in self.config:
             hostname = socket.gethostname()
             prefix = "RaspberryPi-" if self.is_raspberry_pi else ""
             self.config['name'] = f"{prefix}{hostname}"
+            dirty = True
         
-        # Always set the resolution to the fixed value
-        self.config['width'] = self.DEFAULT_WIDTH
-        self.config['height'] = self.DEFAULT_HEIGHT
-        
-        # Save changes
-        self.save()
+        # Only touch the disk if something was filled in
+        if dirty:
+            self.save()
+    
+    def _hash_config(self):
+        """Hash the canonical JSON form of the current configuration"""
+        data = _dumps(self.config, sort_keys=True)
+        return hashlib.blake2b(data, digest_size=16).digest()
     
     def load(self):
         """Load configuration from file"""
         if os.path.exists(self.CONFIG_FILE):
             try:
-                with open(self.CONFIG_FILE, 'r') as f:
-                    return json.load(f)
+                with open(self.CONFIG_FILE, 'rb') as f:
+                    return _loads(f.read())
             except Exception as e:
-                logger.error(f"Error loading config: {str(e)}")
+                logger.error("Error loading config: %s", e)
         
         return {}
     
     def save(self):
-        """Save configuration to file"""
+        """Save configuration to file, skipping the write if nothing changed"""
+        config_hash = self._hash_config()
+        if config_hash == self._saved_hash and os.path.exists(self.CONFIG_FILE):
+            return
+        
+        # Write to a temporary file and rename so a power loss can't corrupt the config
+        tmp_file = f"{self.CONFIG_FILE}.tmp"
         try:
-            with open(self.CONFIG_FILE, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            with open(tmp_file, 'wb') as f:
+                f.write(_dumps(self.config, indent=True))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.CONFIG_FILE)
+            self._saved_hash = config_hash
         except Exception as e:
-            logger.error(f"Error saving config: {str(e)}")
+            logger.error("Error saving config: %s", e)
     
     def get(self, key, default=None):
         """Get a configuration value with optional default"""
@@ -81,33 +123,36 @@ class ConfigManager:
     def set(self, key, value):
         """Set a configuration value and save"""
         self.config[key] = value
+        if key in ('server_url', 'width', 'height', 'name', 'client_id'):
+            setattr(self, f"_{key}", value)
         self.save()
     
     def get_client_id(self):
         """Get the client ID or None if not registered"""
-        return self.config.get('client_id')
+        return self._client_id
     
     def set_client_id(self, client_id):
         """Set the client ID after registration"""
         self.config['client_id'] = client_id
+        self._client_id = client_id
         self.save()
     
     @property
     def server_url(self):
         """Get the server URL"""
-        return self.config.get('server_url', self.DEFAULT_SERVER_URL)
+        return self._server_url
     
     @property
     def width(self):
         """Get screen width"""
-        return self.config.get('width', self.DEFAULT_WIDTH)
+        return self._width
     
     @property
     def height(self):
         """Get screen height"""
-        return self.config.get('height', self.DEFAULT_HEIGHT)
+        return self._height
     
     @property
     def name(self):
         """Get client name"""
-        return self.config.get('name', socket.gethostname())
\ No newline at end of file
+        return self._name
\ No newline at end of file
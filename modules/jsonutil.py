@@ -0,0 +1,50 @@
+"""
+JSON Helpers for LED Wall Client
+Serializes with orjson when it is installed, falling back to the standard library
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(data):
+    """Parse JSON from bytes or str
+
+    Args:
+        data: JSON document
+
+    Returns:
+        Parsed Python object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj, indent=False, sort_keys=False):
+    """Serialize an object to UTF-8 encoded JSON
+
+    Both backends use equivalent formatting: compact by default, or
+    indented with 2 spaces (the only width orjson supports). Some floats
+    are spelled differently (orjson writes 1e16, the stdlib 1e+16).
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation
+        sort_keys: Sort dictionary keys
+
+    Returns:
+        bytes: Encoded JSON document
+    """
+    if orjson is not None:
+        option = 0
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+
+    if indent:
+        return json.dumps(obj, indent=2, sort_keys=sort_keys, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), sort_keys=sort_keys, ensure_ascii=False).encode('utf-8')
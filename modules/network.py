@@ -3,20 +3,37 @@ Network Module for LED Wall Client
 Handles communication with the server via HTTP and WebSocket
 """
 import os
-import time
-import json
+import random
+import shutil
+import hashlib
 import logging
 import requests
 import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .jsonutil import loads as _loads, dumps as _dumps
+
+# socket.io is optional - without it we fall back to HTTP polling
+try:
+    import socketio
+except ImportError:
+    socketio = None
 
 logger = logging.getLogger("led_client.network")
 
 # Default constants
 POLLING_INTERVAL = 30  # seconds
+RECONNECT_DELAY_MIN = 0.2  # seconds
+RECONNECT_DELAY_MAX = 30.0  # seconds
+JSON_HEADERS = {'Content-Type': 'application/json'}
+REQUEST_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+DOWNLOAD_TIMEOUT = (5, 60)  # (connect, read) seconds
+SHUTDOWN_TIMEOUT = 2  # seconds
+DOWNLOAD_BUFFER_SIZE = 1 << 20  # 1 MB
 
 # Get absolute path for downloads folder
 SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DOWNLOAD_FOLDER = os.path.join(SCRIPT_DIR, "downloads")
+DOWNLOAD_FOLDER = os.path.abspath(os.path.join(SCRIPT_DIR, "downloads"))
 
 class ServerConnection:
     """Handles communication with the LED Wall server"""
@@ -36,10 +53,37 @@ class ServerConnection:
         self.client_id = self.config.get_client_id()
         self.socket = None
         self.socket_connected = False
-        self._polling_thread = None
-        self._polling_active = False
-        self._last_handled_content_id = None
+        
+        # Create the socket.io client once and reuse it across reconnects;
+        # reconnection is handled by our own backoff timer
+        if socketio is not None:
+            self.socket = socketio.Client(reconnection=False, logger=False, engineio_logger=False)
+            self._setup_socket_handlers()
+        
+        self._reconnect_timer = None
+        self._reconnect_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._handle_lock = threading.Lock()
+        self._in_flight = set()
+        self._client_etag = None
+        self._client_last_modified = None
+        self._client_info_hash = None
         self._current_prices = None
+        self._status_template = None
+        self._build_status_template()
+        self._reconnect_delay_min = RECONNECT_DELAY_MIN
+        self._reconnect_delay_max = RECONNECT_DELAY_MAX
+        self._reconnect_delay = self._reconnect_delay_min
+
+        # Persistent HTTP session so connections are kept alive and reused
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
 
         # Ensure download directory exists
         os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
@@ -51,25 +95,27 @@ class ServerConnection:
             bool: True if registration was successful, False otherwise
         """
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.server_url}/api/register",
                 json={
                     'name': self.config.name,
                     'width': self.config.width,
                     'height': self.config.height
-                }
+                },
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response.content)
                 self.client_id = data.get('client_id')
                 self.config.set_client_id(self.client_id)
-                logger.info(f"Successfully registered with server. Client ID: {self.client_id}")
+                self._build_status_template()
+                logger.info("Successfully registered with server. Client ID: %s", self.client_id)
                 return True
             else:
-                logger.error(f"Failed to register with server: {response.text}")
+                logger.error("Failed to register with server: %s", response.text)
         except Exception as e:
-            logger.error(f"Error during registration: {str(e)}")
+            logger.error("Error during registration: %s", e)
         
         return False
     
@@ -79,57 +125,84 @@ class ServerConnection:
         Returns:
             bool: True if connection was successful, False otherwise
         """
+        if not self.socket:
+            logger.warning("python-socketio not available, using HTTP polling only")
+            # Poll right away, then fall back to polling on a timer
+            self._schedule_reconnect(delay=0)
+            return False
+        
         try:
-            # Try to import socketio - if not available, we'll fall back to polling
-            import socketio
-            
-            # Initialize socket.io client
-            self.socket = socketio.Client()
-            self._setup_socket_handlers()
-            
             # Connect to server
             self.socket.connect(self.server_url)
             return True
-        except ImportError:
-            logger.warning("python-socketio not available, using HTTP polling only")
-            # Start polling thread as fallback
-            self._start_polling()
-            return False
         except Exception as e:
-            logger.error(f"Failed to connect to server: {str(e)}")
-            # Start polling thread as fallback
-            self._start_polling()
+            logger.error("Failed to connect to server: %s", e)
+            # Fall back to polling on a timer
+            self._schedule_reconnect()
             return False
     
     def reconnect(self):
-        """Attempt to reconnect to the server if disconnected"""
-        if self.socket:
-            try:
-                if not self.socket_connected:
-                    logger.info("Attempting to reconnect to server...")
-                    self.socket.connect(self.server_url)
-                    return True
-            except Exception as e:
-                logger.error(f"Failed to reconnect: {str(e)}")
-                # Fall back to polling if reconnection fails
-                if not self._polling_active:
-                    self._start_polling()
-        elif not self._polling_active:
-            # No socket, make sure polling is active
-            self._start_polling()
+        """Attempt to reconnect to the server if disconnected
         
-        return False
+        Returns:
+            bool: True if the WebSocket is connected, False otherwise
+        """
+        if not self.socket or self._stop_event.is_set():
+            return False
+        if self.socket_connected:
+            return True
+        
+        try:
+            logger.info("Attempting to reconnect to server...")
+            self.socket.connect(self.server_url)
+            return True
+        except Exception as e:
+            logger.error("Failed to reconnect: %s", e)
+            return False
+    
+    def next_reconnect_delay(self):
+        """Get the delay before the next reconnect attempt and advance the backoff
+        
+        Returns:
+            float: Current backoff delay in seconds with +/-20% jitter
+        """
+        delay = self._reconnect_delay * random.uniform(0.8, 1.2)
+        
+        # Back off exponentially before the attempt after this one
+        self._reconnect_delay = min(self._reconnect_delay_max, self._reconnect_delay * 2)
+        return delay
+    
+    def _reset_reconnect_delay(self):
+        """Reset the reconnect backoff after a successful connection"""
+        self._reconnect_delay = self._reconnect_delay_min
     
     def disconnect(self):
         """Disconnect from the server"""
+        # Stop any pending reconnect/poll attempt first, so the socket's
+        # disconnect handler can't arm a new one during teardown
+        with self._reconnect_lock:
+            self._stop_event.set()
+            if self._reconnect_timer:
+                self._reconnect_timer.cancel()
+        
         if self.socket and self.socket_connected:
-            try:
-                self.socket.disconnect()
-            except Exception as e:
-                logger.error(f"Error disconnecting from server: {str(e)}")
+            # Disconnect on a helper thread so a dead peer can't stall shutdown
+            disconnect_thread = threading.Thread(target=self._disconnect_socket)
+            disconnect_thread.daemon = True
+            disconnect_thread.start()
+            disconnect_thread.join(timeout=SHUTDOWN_TIMEOUT)
+            if disconnect_thread.is_alive():
+                logger.warning("Timed out disconnecting from server")
         
-        # Stop polling if active
-        self._polling_active = False
+        # Release pooled HTTP connections
+        self._session.close()
+    
+    def _disconnect_socket(self):
+        """Close the WebSocket connection"""
+        try:
+            self.socket.disconnect()
+        except Exception as e:
+            logger.error("Error disconnecting from server: %s", e)
     
     def is_connected(self):
         """Check if connected to the server via WebSocket
@@ -148,74 +221,85 @@ class ServerConnection:
         def connect():
             logger.info("Connected to server")
             self.socket_connected = True
+            self._reset_reconnect_delay()
             # Register with socket after connection
             self.socket.emit('register', {'client_id': self.client_id})
 
             # Request current prices
             self.socket.emit('request_prices')
-
-            # Stop polling if active (no need for both)
-            self._polling_active = False
         
         @self.socket.event
         def connect_error(data):
-            logger.error(f"Connection error: {data}")
+            logger.error("Connection error: %s", data)
             self.socket_connected = False
             
-            # Start polling as fallback if not already active
-            if not self._polling_active:
-                self._start_polling()
+            # Poll and retry the socket after a backoff delay
+            self._schedule_reconnect()
         
         @self.socket.event
         def disconnect():
             logger.info("Disconnected from server")
             self.socket_connected = False
             
-            # Start polling as fallback if not already active
-            if not self._polling_active:
-                self._start_polling()
+            # Poll and retry the socket after a backoff delay
+            self._schedule_reconnect()
         
         @self.socket.on('registration_success')
         def on_registration_success(data):
-            logger.info(f"Socket registration successful: {data}")
+            logger.info("Socket registration successful: %s", data)
         
         @self.socket.on('registration_failed')
         def on_registration_failed(data):
-            logger.error(f"Socket registration failed: {data}")
+            logger.error("Socket registration failed: %s", data)
         
         @self.socket.on('content_assigned')
         def on_content_assigned(data):
             content_id = data.get('content_id')
-            logger.info(f"New content assigned via WebSocket: {content_id}")
+            logger.info("New content assigned via WebSocket: %s", content_id)
             self._handle_content_update(content_id)
 
         @self.socket.on('price_update')
         def on_price_update(data):
             prices = data.get('prices', [])
-            logger.info(f"Price update received via WebSocket: {prices}")
+            logger.info("Price update received via WebSocket: %s", prices)
             self._handle_price_update(prices)
     
-    def _start_polling(self):
-        """Start polling thread for server updates"""
-        if self._polling_active:
-            return
+    def _schedule_reconnect(self, delay=None):
+        """Schedule a one-shot reconnect attempt after the current backoff delay
+        
+        Args:
+            delay: Seconds to wait instead of the backoff/polling delay
+        """
+        with self._reconnect_lock:
+            if self._stop_event.is_set():
+                return
+            if self._reconnect_timer and self._reconnect_timer.is_alive():
+                return
             
-        self._polling_active = True
-        self._polling_thread = threading.Thread(target=self._polling_loop)
-        self._polling_thread.daemon = True
-        self._polling_thread.start()
-        logger.info("Started polling for server updates")
+            # Without socket.io there is nothing to reconnect, just poll.
+            # This is the only place the backoff advances, and only when a
+            # failed attempt actually arms a new timer
+            if delay is None:
+                delay = self.next_reconnect_delay() if self.socket else POLLING_INTERVAL
+            self._reconnect_timer = threading.Timer(delay, self._try_reconnect)
+            self._reconnect_timer.daemon = True
+            self._reconnect_timer.start()
     
-    def _polling_loop(self):
-        """Main polling loop to check for content updates"""
-        while self._polling_active:
-            try:
-                self.check_for_updates()
-            except Exception as e:
-                logger.error(f"Error in polling loop: {str(e)}")
-            
-            # Sleep before next poll
-            time.sleep(POLLING_INTERVAL)
+    def _try_reconnect(self):
+        """Poll for updates over HTTP and try to restore the WebSocket"""
+        with self._reconnect_lock:
+            self._reconnect_timer = None
+        
+        if self._stop_event.is_set() or self.socket_connected:
+            return
+        
+        try:
+            self.check_for_updates()
+        except Exception as e:
+            logger.error("Error polling for updates: %s", e)
+        
+        if not self.reconnect():
+            self._schedule_reconnect()
     
     def check_for_updates(self):
         """Check for content updates from server using HTTP"""
@@ -224,21 +308,53 @@ class ServerConnection:
                 logger.warning("No client ID available, skipping update check")
                 return False
                 
+            # Send validators from the last response so the server can reply 304
+            headers = {}
+            if self._client_etag:
+                headers['If-None-Match'] = self._client_etag
+            if self._client_last_modified:
+                headers['If-Modified-Since'] = self._client_last_modified
+            
             # Get client info from server
-            response = requests.get(f"{self.server_url}/api/client/{self.client_id}")
-            if response.status_code == 200:
-                client_info = response.json()
+            response = self._session.get(
+                f"{self.server_url}/api/client/{self.client_id}",
+                headers=headers,
+                timeout=REQUEST_TIMEOUT
+            )
+            if response.status_code == 304:
+                return False
+            elif response.status_code == 200:
+                # Skip parsing and dispatch if the body hasn't changed
+                body_hash = hashlib.blake2b(response.content, digest_size=16).digest()
+                if body_hash == self._client_info_hash:
+                    return False
+                
+                client_info = _loads(response.content)
                 assigned_content = client_info.get('current_content')
                 
                 # If new content is assigned, handle it
-                if assigned_content and assigned_content != self._last_handled_content_id:
-                    logger.info(f"New content detected via polling: {assigned_content}")
-                    self._handle_content_update(assigned_content)
-                    return True
+                handled = True
+                new_content = bool(assigned_content)
+                if new_content:
+                    logger.info("New content detected via polling: %s", assigned_content)
+                    handled = self._handle_content_update(assigned_content)
+                
+                # Only cache this response once it has been handled, so failures are retried
+                if handled:
+                    self._client_etag = response.headers.get('ETag')
+                    self._client_last_modified = response.headers.get('Last-Modified')
+                    self._client_info_hash = body_hash
+                else:
+                    self._client_etag = None
+                    self._client_last_modified = None
+                    self._client_info_hash = None
+                
+                if new_content:
+                    return handled
             else:
-                logger.error(f"Failed to get client info: {response.status_code}")
+                logger.error("Failed to get client info: %s", response.status_code)
         except Exception as e:
-            logger.error(f"Error checking for updates: {str(e)}")
+            logger.error("Error checking for updates: %s", e)
         
         return False
     
@@ -247,50 +363,48 @@ class ServerConnection:
         
         Args:
             content_id: ID of the content to handle
+            
+        Returns:
+            bool: True if the content was handled, False if it failed or was
+            skipped because another thread is still handling it
         """
+        # Prevent concurrent handling of the same content assignment.
+        # A skipped duplicate isn't reported as handled, so polling keeps
+        # retrying in case the in-flight attempt fails
+        with self._handle_lock:
+            if content_id in self._in_flight:
+                logger.info("Content %s already being handled, skipping duplicate request", content_id)
+                return False
+            self._in_flight.add(content_id)
+        
         try:
-            # Prevent duplicate handling of the same content assignment
-            if content_id == self._last_handled_content_id:
-                logger.info(f"Content {content_id} already being handled, skipping duplicate request")
-                return True
-                
-            # Track that we're handling this content ID
-            self._last_handled_content_id = content_id
-            
             # Get content info
-            response = requests.get(f"{self.server_url}/api/content/{content_id}")
+            response = self._session.get(
+                f"{self.server_url}/api/content/{content_id}",
+                timeout=REQUEST_TIMEOUT
+            )
             if response.status_code != 200:
-                logger.error(f"Failed to get content info: {response.text}")
-                self._last_handled_content_id = None  # Reset to allow retry
+                logger.error("Failed to get content info: %s", response.text)
                 return False
             
-            content_info = response.json()
+            content_info = _loads(response.content)
             
             # Download the content file if needed
             file_path = self.ensure_content_downloaded(content_id, content_info)
             if not file_path:
                 return False
             
-            # Call the content callback if provided
-            if self.content_callback:
+            # Call the content callback if provided, unless we're shutting down
+            if self.content_callback and not self._stop_event.is_set():
                 self.content_callback(content_id, content_info)
             
-            # Reset after delay to prevent immediate duplicate processing
-            def reset_handled_id():
-                time.sleep(2)  # Wait before allowing reprocessing
-                if self._last_handled_content_id == content_id:
-                    self._last_handled_content_id = None
-            
-            # Start thread to reset handler flag after delay
-            reset_thread = threading.Thread(target=reset_handled_id)
-            reset_thread.daemon = True
-            reset_thread.start()
-            
             return True
         except Exception as e:
-            logger.error(f"Error handling content update: {str(e)}")
-            self._last_handled_content_id = None  # Reset to allow retry
+            logger.error("Error handling content update: %s", e)
             return False
+        finally:
+            with self._handle_lock:
+                self._in_flight.discard(content_id)
 
     def _handle_price_update(self, prices):
         """Handle price update from server
@@ -307,7 +421,7 @@ class ServerConnection:
             # Update current prices
             self._current_prices = prices.copy()
 
-            logger.info(f"Processing price update: {prices}")
+            logger.info("Processing price update: %s", prices)
 
             # Call the price callback if provided
             if self.price_callback:
@@ -318,7 +432,7 @@ class ServerConnection:
                 return False
 
         except Exception as e:
-            logger.error(f"Error handling price update: {str(e)}")
+            logger.error("Error handling price update: %s", e)
             return False
     
     def ensure_content_downloaded(self, content_id, content_info):
@@ -333,46 +447,112 @@ class ServerConnection:
         """
         file_path = os.path.join(DOWNLOAD_FOLDER, content_info['filename'])
         
-        # Check if file already exists
+        file_url = f"{self.server_url}/api/content/{content_id}/file"
+        
+        # Check if file already exists and is complete
         if os.path.exists(file_path):
-            logger.info(f"Content file already exists: {file_path}")
-            return file_path
+            if self._is_download_complete(file_path, file_url, content_info):
+                logger.info("Content file already exists: %s", file_path)
+                content_info['_local_path'] = file_path
+                return file_path
+            logger.warning("Content file is incomplete or stale, re-downloading: %s", file_path)
         
-        # Download the file
+        # Download to a temporary file first so an interrupted download
+        # never leaves a truncated file at the final path
+        tmp_path = f"{file_path}.part"
         try:
-            logger.info(f"Downloading content: {content_info['name']}")
-            response = requests.get(
-                f"{self.server_url}/api/content/{content_id}/file", 
-                stream=True
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Failed to download content: {response.text}")
-                return None
-            
-            # Save the file
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            logger.info("Downloading content: %s", content_info['name'])
+            with self._session.get(
+                file_url,
+                stream=True,
+                timeout=DOWNLOAD_TIMEOUT
+            ) as response:
+                if response.status_code != 200:
+                    logger.error("Failed to download content: %s", response.text)
+                    return None
+                
+                # Save the file, copying in large blocks
+                response.raw.decode_content = True
+                with open(tmp_path, 'wb', buffering=DOWNLOAD_BUFFER_SIZE) as f:
+                    shutil.copyfileobj(response.raw, f, length=DOWNLOAD_BUFFER_SIZE)
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                # Verify the download is complete when the server reports a size
+                expected_size = response.headers.get('Content-Length')
+                if expected_size and not response.headers.get('Content-Encoding'):
+                    actual_size = os.path.getsize(tmp_path)
+                    if actual_size != int(expected_size):
+                        logger.error("Incomplete download: got %s of %s bytes", actual_size, expected_size)
+                        os.remove(tmp_path)
+                        return None
             
-            logger.info(f"Downloaded content to {file_path}")
+            os.replace(tmp_path, file_path)
+            logger.info("Downloaded content to %s", file_path)
+            content_info['_local_path'] = file_path
             return file_path
         except Exception as e:
-            logger.error(f"Error downloading content: {str(e)}")
+            logger.error("Error downloading content: %s", e)
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
             return None
     
-    def send_status_update(self, status, content_id, message=None):
-        """Send status update to server
+    def _is_download_complete(self, file_path, file_url, content_info):
+        """Check whether a local content file matches the expected size
+        
+        Args:
+            file_path: Path to the local file
+            file_url: URL the file is downloaded from
+            content_info: Dict containing content information
+            
+        Returns:
+            bool: True if the file is complete or its size can't be determined
+        """
+        expected_size = content_info.get('size')
+        if expected_size is None:
+            # Ask the server for the size without downloading the file
+            try:
+                response = self._session.head(file_url, timeout=REQUEST_TIMEOUT)
+                if response.status_code != 200:
+                    return True
+                expected_size = response.headers.get('Content-Length')
+            except Exception as e:
+                logger.warning("Could not check content size: %s", e)
+                return True
+        
+        try:
+            expected_size = int(expected_size)
+        except (TypeError, ValueError):
+            return True
+        
+        return expected_size < 0 or os.path.getsize(file_path) == expected_size
+    
+    def _build_status_template(self):
+        """Pre-serialize the status update body for the current client ID"""
+        if not self.client_id:
+            self._status_template = None
+            return
+        
+        self._status_template = _dumps({
+            'client_id': self.client_id,
+            'status': '__S__',
+            'content_id': '__C__'
+        })
+    
+    def _build_status_data(self, status, content_id, message=None):
+        """Build the status update payload
         
         Args:
             status: Status string (e.g., 'playing', 'error')
             content_id: ID of the content being played
             message: Optional status message
-        """
-        if not self.client_id:
-            logger.warning("No client ID available, skipping status update")
-            return False
             
+        Returns:
+            dict: Status update payload
+        """
         status_data = {
             'client_id': self.client_id,
             'status': status,
@@ -381,22 +561,42 @@ class ServerConnection:
         
         if message:
             status_data['message'] = message
+        return status_data
+    
+    def send_status_update(self, status, content_id, message=None):
+        """Send status update to server
+        
+        Args:
+            status: Status string (e.g., 'playing', 'error')
+            content_id: ID of the content being played
+            message: Optional status message
+        """
+        if not self.client_id:
+            logger.warning("No client ID available, skipping status update")
+            return False
             
         # Try socket.io first if available
         if self.socket and self.socket_connected:
             try:
-                self.socket.emit('status_update', status_data)
+                self.socket.emit('status_update', self._build_status_data(status, content_id, message))
                 return True
             except Exception as e:
-                logger.error(f"Failed to send status update via socket: {str(e)}")
+                logger.error("Failed to send status update via socket: %s", e)
+        
+        # HTTP fallback, filling in the pre-serialized body when possible
+        if not message and self._status_template:
+            body = self._status_template.replace(b'"__S__"', _dumps(status)).replace(b'"__C__"', _dumps(content_id))
+        else:
+            body = _dumps(self._build_status_data(status, content_id, message))
         
-        # HTTP fallback
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.server_url}/api/client/{self.client_id}",
-                json=status_data
+                data=body,
+                headers=JSON_HEADERS,
+                timeout=REQUEST_TIMEOUT
             )
             return response.status_code == 200
         except Exception as e:
-            logger.error(f"Failed to send status update via HTTP: {str(e)}")
+            logger.error("Failed to send status update via HTTP: %s", e)
             return False
\ No newline at end of file
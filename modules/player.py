@@ -3,12 +3,13 @@ Media Player Module for LED Wall Client
 Handles media playback using FFplay and price display generation
 """
 import os
-import time
+import queue
 import logging
 import subprocess
 import threading
 import shutil
 import platform
+from .window import WindowController
 
 logger = logging.getLogger("led_client.player")
 
@@ -25,6 +26,23 @@ class MediaPlayer:
         self.player_process = None
         self.is_windows = platform.system() == "Windows"
         self.is_raspberry_pi = self.config._detect_raspberry_pi()
+        self._window = WindowController()
+
+        # Resolve external tools once instead of walking PATH on every call
+        self._ffplay_path = shutil.which('ffplay')
+        self._xdotool_path = shutil.which('xdotool')
+
+        # Have SDL place the ffplay window at 0,0 itself so it doesn't need
+        # to be moved after it appears
+        self._player_env = os.environ.copy()
+        self._player_env['SDL_VIDEO_WINDOW_POS'] = '0,0'
+        self._player_env['SDL_VIDEO_CENTERED'] = '0'
+
+        # Single long-lived thread that waits on each player process in turn
+        self._monitor_queue = queue.Queue()
+        self._monitor_thread = threading.Thread(target=self._monitor_loop)
+        self._monitor_thread.daemon = True
+        self._monitor_thread.start()
 
         # Initialize price display generator
         try:
@@ -35,12 +53,12 @@ class MediaPlayer:
             )
             logger.info("Price display generator initialized")
         except ImportError as e:
-            logger.error(f"Failed to import PriceDisplay: {e}")
+            logger.error("Failed to import PriceDisplay: %s", e)
             self.price_display = None
     
     def is_ffplay_available(self):
         """Check if ffplay is available in the system PATH"""
-        return shutil.which("ffplay") is not None
+        return self._ffplay_path is not None
     
     def play(self, file_path, content_info, callback=None):
         """Play media content using ffplay with platform-specific optimizations
@@ -64,7 +82,7 @@ class MediaPlayer:
             
             # Base command for all platforms
             cmd = [
-                'ffplay', 
+                self._ffplay_path, 
                 '-x', str(width), 
                 '-y', str(height),
                 '-alwaysontop',
@@ -80,10 +98,22 @@ class MediaPlayer:
                 '-vf', f'scale={width}:{height}:force_original_aspect_ratio=disable'
             ])
             
-            # Add the file path
+            # Skip ffplay's stream analysis so the first frame shows immediately
+            cmd.extend(['-probesize', '32', '-analyzeduration', '0'])
+            
+            # Disable input buffering for streams, or for local files if enabled
+            # in config (it can cause freezes with some codecs)
+            is_stream = '://' in file_path
+            if is_stream or self.config.get('ffplay_nobuffer', False):
+                cmd.extend(['-fflags', 'nobuffer', '-flags', 'low_delay'])
+            if is_stream:
+                cmd.append('-infbuf')
+            
+            # Add the file path (input options must come before it)
             cmd.append(file_path)
             
-            logger.info(f"Starting player with command: {' '.join(cmd)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Starting player with command: %s", ' '.join(cmd))
             
             # Stop any existing playback
             self.stop()
@@ -91,45 +121,25 @@ class MediaPlayer:
             # For Linux/Raspberry Pi, use different approach to avoid console spam
             if not self.is_windows:
                 # Redirect output to /dev/null on Linux/Raspberry Pi
-                with open(os.devnull, 'w') as devnull:
-                    self.player_process = subprocess.Popen(
-                        cmd, 
-                        stdout=devnull, 
-                        stderr=devnull,
-                        start_new_session=True  # Detach from parent process
-                    )
-                
-                # On Raspberry Pi, use a method to move window to top-left corner
-                if self.is_raspberry_pi:
-                    try:
-                        # Allow ffplay window to initialize before moving it
-                        time.sleep(1)
-                        # Use xdotool to move window (must be installed on Raspberry Pi)
-                        if shutil.which('xdotool'):
-                            move_cmd = [
-                                'xdotool', 'search', '--name', 'LEDWallPlayer', 
-                                'windowmove', '0', '0', 'windowactivate'
-                            ]
-                            subprocess.Popen(move_cmd)
-                    except Exception as e:
-                        logger.warning(f"Could not position window: {str(e)}")
+                self.player_process = subprocess.Popen(
+                    cmd, 
+                    stdout=subprocess.DEVNULL, 
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,  # Detach from parent process
+                    env=self._player_env
+                )
             else:
                 # Windows version
-                self.player_process = subprocess.Popen(cmd)
-                # Position window properly on Windows
-                self._position_window_windows()
+                self.player_process = subprocess.Popen(cmd, env=self._player_env)
+                # Position window properly on Windows without blocking the caller
+                self._start_window_positioning()
             
-            # Start monitor thread to detect when playback ends
-            monitor_thread = threading.Thread(
-                target=self._monitor_playback, 
-                args=(content_info, callback)
-            )
-            monitor_thread.daemon = True
-            monitor_thread.start()
+            # Hand the process to the monitor thread to detect when playback ends
+            self._monitor_queue.put((self._monitor_playback, self.player_process, content_info, callback))
             
             return True
         except Exception as e:
-            logger.error(f"Error playing content: {str(e)}")
+            logger.error("Error playing content: %s", e)
             return False
 
     def display_prices(self, prices, callback=None):
@@ -166,7 +176,7 @@ class MediaPlayer:
 
             # FFmpeg command to display the image
             cmd = [
-                'ffplay',
+                self._ffplay_path,
                 '-x', str(width),
                 '-y', str(height),
                 '-alwaysontop',
@@ -178,7 +188,8 @@ class MediaPlayer:
                 image_path
             ]
 
-            logger.info(f"Starting price display with command: {' '.join(cmd)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Starting price display with command: %s", ' '.join(cmd))
 
             # Stop any existing playback
             self.stop()
@@ -186,178 +197,89 @@ class MediaPlayer:
             # Start the display process
             if not self.is_windows:
                 # Linux/Raspberry Pi version
-                with open(os.devnull, 'w') as devnull:
-                    self.player_process = subprocess.Popen(
-                        cmd,
-                        stdout=devnull,
-                        stderr=devnull,
-                        start_new_session=True
-                    )
-
-                # Position window on Raspberry Pi
-                if self.is_raspberry_pi:
-                    try:
-                        time.sleep(1)
-                        if shutil.which('xdotool'):
-                            move_cmd = [
-                                'xdotool', 'search', '--name', 'LEDWallPlayer',
-                                'windowmove', '0', '0', 'windowactivate'
-                            ]
-                            subprocess.Popen(move_cmd)
-                    except Exception as e:
-                        logger.warning(f"Could not position window: {str(e)}")
+                self.player_process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,
+                    env=self._player_env
+                )
             else:
                 # Windows version
-                self.player_process = subprocess.Popen(cmd)
-                # Position window properly on Windows
-                self._position_window_windows()
+                self.player_process = subprocess.Popen(cmd, env=self._player_env)
+                # Position window properly on Windows without blocking the caller
+                self._start_window_positioning()
 
-            # Start monitor thread
-            monitor_thread = threading.Thread(
-                target=self._monitor_price_display,
-                args=(prices, callback)
-            )
-            monitor_thread.daemon = True
-            monitor_thread.start()
+            # Hand the process to the monitor thread
+            self._monitor_queue.put((self._monitor_price_display, self.player_process, prices, callback))
 
-            logger.info(f"Price display started for prices: {prices}")
+            logger.info("Price display started for prices: %s", prices)
             return True
 
         except Exception as e:
-            logger.error(f"Error displaying prices: {str(e)}")
+            logger.error("Error displaying prices: %s", e)
             return False
 
-    def _monitor_price_display(self, prices, callback=None):
+    def _monitor_loop(self):
+        """Run queued monitor jobs one at a time
+
+        Only one ffplay process runs at a time, so waiting on each in turn is
+        equivalent to a thread per process without the per-play thread cost.
+        """
+        while True:
+            monitor, process, info, callback = self._monitor_queue.get()
+            monitor(process, info, callback)
+
+    def _monitor_price_display(self, process, prices, callback=None):
         """Monitor price display process
 
         Args:
+            process: The price display process to wait on
             prices: Current prices being displayed
             callback: Optional callback
         """
-        process = self.player_process
-
         if not process:
-            logger.warning("Monitor thread started but player_process is None")
+            logger.warning("Monitor job queued but player_process is None")
             return
 
         try:
             process.wait()
             if process == self.player_process:
                 exit_code = process.returncode
-                logger.info(f"Price display process exited with code {exit_code}")
+                logger.info("Price display process exited with code %s", exit_code)
 
                 if callback:
                     callback(prices, exit_code)
         except Exception as e:
-            logger.error(f"Error monitoring price display: {str(e)}")
+            logger.error("Error monitoring price display: %s", e)
     
+    def _start_window_positioning(self):
+        """Position the player window on a background thread (Windows only)
+
+        Waiting for ffplay to create its window can take up to two seconds,
+        which play() and display_prices() shouldn't be held up by.
+        """
+        if not self.is_windows:
+            return
+
+        thread = threading.Thread(target=self._position_window_windows)
+        thread.daemon = True
+        thread.start()
+
     def _position_window_windows(self):
-        """Position the window at 0,0 and enable cursor hiding (Windows only)"""
+        """Position the window at 0,0 on top (Windows only)"""
         if not self.is_windows:
             return
             
         try:
-            # Using PowerShell to position the window
-            position_cmd = [
-                'powershell',
-                '-command',
-                """
-                Start-Sleep -Milliseconds 500
-                
-                # Add necessary types for window functions
-                Add-Type @"
-                    using System;
-                    using System.Runtime.InteropServices;
-                    
-                    public class WindowHelper {
-                        [DllImport("user32.dll")]
-                        public static extern bool SetWindowPos(IntPtr hWnd, IntPtr hWndInsertAfter, int X, int Y, int cx, int cy, uint uFlags);
-                        
-                        [DllImport("user32.dll")]
-                        public static extern bool ShowCursor(bool bShow);
-                        
-                        [DllImport("user32.dll")]
-                        public static extern bool GetCursorPos(out POINT lpPoint);
-                        
-                        [DllImport("user32.dll")]
-                        public static extern IntPtr WindowFromPoint(POINT Point);
-                        
-                        [StructLayout(LayoutKind.Sequential)]
-                        public struct POINT {
-                            public int X;
-                            public int Y;
-                        }
-                    }
-"@
-
-                # Find the player window
-                $w = (Get-Process | Where-Object {$_.MainWindowTitle -eq 'LEDWallPlayer'} | Select-Object -First 1)
-                
-                if ($w) {
-                    # Position the window at 0,0 and on top
-                    [WindowHelper]::SetWindowPos($w.MainWindowHandle, -1, 0, 0, """ + str(self.config.width) + """, """ + str(self.config.height) + """, 0x0040)
-                    
-                    # Start a background job to hide cursor when over the player window
-                    $job = Start-Job -ScriptBlock {
-                        param($windowTitle, $width, $height)
-                        Add-Type @"
-                            using System;
-                            using System.Runtime.InteropServices;
-                            
-                            public class WindowHelper {
-                                [DllImport("user32.dll")]
-                                public static extern bool SetWindowPos(IntPtr hWnd, IntPtr hWndInsertAfter, int X, int Y, int cx, int cy, uint uFlags);
-                                
-                                [DllImport("user32.dll")]
-                                public static extern bool ShowCursor(bool bShow);
-                                
-                                [DllImport("user32.dll")]
-                                public static extern bool GetCursorPos(out POINT lpPoint);
-                                
-                                [DllImport("user32.dll")]
-                                public static extern IntPtr WindowFromPoint(POINT Point);
-                                
-                                [StructLayout(LayoutKind.Sequential)]
-                                public struct POINT {
-                                    public int X;
-                                    public int Y;
-                                }
-                            }
-"@
-                        while ($true) {
-                            # Check if window still exists
-                            $w = (Get-Process | Where-Object {$_.MainWindowTitle -eq $windowTitle} | Select-Object -First 1)
-                            if (-not $w) {
-                                # Window closed, exit the loop
-                                break
-                            }
-                            
-                            # Get cursor position
-                            $point = New-Object WindowHelper+POINT
-                            [WindowHelper]::GetCursorPos([ref]$point)
-                            
-                            # Check if cursor is over the player (top-left corner within dimensions)
-                            if ($point.X -ge 0 -and $point.X -lt $width -and $point.Y -ge 0 -and $point.Y -lt $height) {
-                                # Hide cursor
-                                [WindowHelper]::ShowCursor($false) | Out-Null
-                            } else {
-                                # Show cursor
-                                [WindowHelper]::ShowCursor($true) | Out-Null
-                            }
-                            
-                            # Sleep to reduce CPU usage
-                            Start-Sleep -Milliseconds 50
-                        }
-                        
-                        # Ensure cursor is visible when exiting
-                        [WindowHelper]::ShowCursor($true) | Out-Null
-                    } -ArgumentList 'LEDWallPlayer', """ + str(self.config.width) + """, """ + str(self.config.height) + """
-                }
-                """
-            ]
-            subprocess.Popen(position_cmd)
+            # Wait for ffplay to create its window, then position it at 0,0 on top
+            window = self._window.wait_for_window()
+            if window:
+                self._window.position(self.config.width, self.config.height, window)
+            else:
+                logger.warning("Player window not found, could not position it")
         except Exception as e:
-            logger.warning(f"Error positioning window with PowerShell: {str(e)}")
+            logger.warning("Error positioning window: %s", e)
     
     def hide(self):
         """Hide the player window (platform-specific implementation)"""
@@ -366,24 +288,19 @@ class MediaPlayer:
             
         try:
             if self.is_windows:
-                # Windows-specific implementation using PowerShell
-                hide_cmd = [
-                    'powershell', 
-                    '-command', 
-                    "(Get-Process | Where-Object {$_.MainWindowTitle -eq 'LEDWallPlayer'} | ForEach-Object { $showWindowAsync = Add-Type -MemberDefinition '[DllImport(\"user32.dll\")]public static extern bool ShowWindowAsync(IntPtr hWnd, int nCmdShow);' -Name Win32ShowWindowAsync -Namespace Win32Functions -PassThru; $showWindowAsync::ShowWindowAsync($_.MainWindowHandle, 2) })"
-                ]
-                subprocess.run(hide_cmd)
+                # Windows-specific implementation using user32
+                self._window.minimize()
             elif self.is_raspberry_pi:
                 # Raspberry Pi implementation using xdotool
-                if shutil.which('xdotool'):
-                    hide_cmd = ['xdotool', 'search', '--name', 'LEDWallPlayer', 'windowminimize']
+                if self._xdotool_path:
+                    hide_cmd = [self._xdotool_path, 'search', '--name', 'LEDWallPlayer', 'windowminimize']
                     subprocess.run(hide_cmd)
                 else:
                     logger.warning("xdotool not available for window manipulation on Raspberry Pi")
             
             logger.info("Player window hidden")
         except Exception as e:
-            logger.error(f"Error hiding player: {str(e)}")
+            logger.error("Error hiding player: %s", e)
     
     def show(self):
         """Show the player window (platform-specific implementation)"""
@@ -392,37 +309,30 @@ class MediaPlayer:
             
         try:
             if self.is_windows:
-                # Windows-specific implementation using PowerShell
-                show_cmd = [
-                    'powershell', 
-                    '-command', 
-                    "(Get-Process | Where-Object {$_.MainWindowTitle -eq 'LEDWallPlayer'} | ForEach-Object { $showWindowAsync = Add-Type -MemberDefinition '[DllImport(\"user32.dll\")]public static extern bool ShowWindowAsync(IntPtr hWnd, int nCmdShow);' -Name Win32ShowWindowAsync -Namespace Win32Functions -PassThru; $showWindowAsync::ShowWindowAsync($_.MainWindowHandle, 9) })"
-                ]
-                subprocess.run(show_cmd)
+                # Windows-specific implementation using user32
+                self._window.restore()
             elif self.is_raspberry_pi:
                 # Raspberry Pi implementation using xdotool
-                if shutil.which('xdotool'):
-                    show_cmd = ['xdotool', 'search', '--name', 'LEDWallPlayer', 'windowactivate']
+                if self._xdotool_path:
+                    show_cmd = [self._xdotool_path, 'search', '--name', 'LEDWallPlayer', 'windowactivate']
                     subprocess.run(show_cmd)
                 else:
                     logger.warning("xdotool not available for window manipulation on Raspberry Pi")
             
             logger.info("Player window restored")
         except Exception as e:
-            logger.error(f"Error showing player: {str(e)}")
+            logger.error("Error showing player: %s", e)
     
-    def _monitor_playback(self, content_info, callback=None):
+    def _monitor_playback(self, process, content_info, callback=None):
         """Monitor media playback and restart if needed
         
         Args:
+            process: The player process to wait on
             content_info: Dict containing info about the content
             callback: Optional callback to execute when playback ends
         """
-        # Store a local reference to the process to avoid it becoming None during execution
-        process = self.player_process
-        
         if not process:
-            logger.warning("Monitor thread started but player_process is None")
+            logger.warning("Monitor job queued but player_process is None")
             return
             
         try:
@@ -434,13 +344,13 @@ class MediaPlayer:
             if process == self.player_process:
                 # Process is still the current one
                 exit_code = process.returncode
-                logger.warning(f"Player exited with code {exit_code}")
+                logger.warning("Player exited with code %s", exit_code)
                 
                 # Execute callback if provided
                 if callback:
                     callback(content_info, exit_code)
         except Exception as e:
-            logger.error(f"Error monitoring playback: {str(e)}")
+            logger.error("Error monitoring playback: %s", e)
     
     def stop(self):
         """Stop the current player process"""
@@ -460,11 +370,19 @@ class MediaPlayer:
                     self.player_process.kill()
             else:
                 # On Linux/Raspberry Pi, kill by window title to be more reliable
-                if self.is_raspberry_pi and shutil.which('xdotool'):
+                killed = False
+                if self.is_raspberry_pi and self._xdotool_path:
                     # Use xdotool to find and kill the ffplay window
-                    kill_cmd = "xdotool search --name LEDWallPlayer windowkill"
-                    subprocess.run(kill_cmd, shell=True)
-                else:
+                    kill_cmd = [self._xdotool_path, 'search', '--name', 'LEDWallPlayer', 'windowkill']
+                    try:
+                        result = subprocess.run(kill_cmd, timeout=2)
+                        killed = result.returncode == 0
+                        if not killed:
+                            logger.warning("xdotool could not kill player window (exit code %s)", result.returncode)
+                    except subprocess.TimeoutExpired:
+                        logger.warning("xdotool timed out killing player window")
+                
+                if not killed:
                     # Fallback to normal process termination
                     self.player_process.terminate()
                     try:
@@ -472,6 +390,6 @@ class MediaPlayer:
                     except subprocess.TimeoutExpired:
                         self.player_process.kill()
         except Exception as e:
-            logger.error(f"Error stopping player: {str(e)}")
+            logger.error("Error stopping player: %s", e)
         finally:
             self.player_process = None
\ No newline at end of file
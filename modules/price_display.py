@@ -3,11 +3,46 @@ Price Display Module for LED Wall Client
 Generates visual representation of prices for LED wall display
 """
 import os
+import functools
 from PIL import Image, ImageDraw, ImageFont
 import logging
 
 logger = logging.getLogger("led_client.price_display")
 
+# Fonts to try in order of preference; DejaVu is what Linux usually ends up with
+_DEFAULT_FONT_CANDIDATES = ("arialblk.ttf", "arialbd.ttf", "arial.ttf", "DejaVuSans-Bold.ttf")
+
+@functools.lru_cache(maxsize=1)
+def _find_font_path():
+    """Find the first available price font, probing the candidates only once
+
+    Returns:
+        str: Font file name that FreeType could open, or None if none are available
+    """
+    for font_name in _DEFAULT_FONT_CANDIDATES:
+        try:
+            ImageFont.truetype(font_name, 12)
+            return font_name
+        except OSError:
+            continue
+    logger.warning("No TrueType font found, using PIL default font")
+    return None
+
+@functools.lru_cache(maxsize=128)
+def _load_font(size):
+    """Load the price font at the given size, parsing each size only once
+
+    Args:
+        size: Font size in points
+
+    Returns:
+        PIL.ImageFont: First available bold font, or PIL's default font
+    """
+    font_path = _find_font_path()
+    if font_path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(font_path, size)
+
 class PriceDisplay:
     """Handles generation of price display images for LED wall"""
 
@@ -34,26 +69,47 @@ class PriceDisplay:
         self.row_height = height // self.rows
         self.half_width = width // 2
 
-        # Try to load a good font for LED wall price display, fallback to default
-        try:
-            # Use Arial Black for maximum boldness and LED readability
-            self.font = ImageFont.truetype("arialblk.ttf", 30)
-        except:
-            try:
-                # Fallback to Arial Bold
-                self.font = ImageFont.truetype("arialbd.ttf", 30)
-            except:
-                try:
-                    # Fallback to regular Arial
-                    self.font = ImageFont.truetype("arial.ttf", 30)
-                except:
-                    try:
-                        self.font = ImageFont.truetype("DejaVuSans-Bold.ttf", 30)   #Esta usando esta en linux
-                    except:
-                        # Fallback to default font
-                        self.font = ImageFont.load_default()
-
-        logger.info(f"PriceDisplay initialized: {width}x{height}, {self.rows} rows")
+        # Pre-render the static grid (background, cell borders, separators)
+        self._template = self._build_template()
+
+        # Cache rendered cell text by (price, width, height), and full rows
+        # (left cell plus its right-hand duplicate) by price
+        self._cell_cache = functools.lru_cache(maxsize=64)(self._render_cell)
+        self._row_cache = functools.lru_cache(maxsize=32)(self._render_row)
+
+        # Formatted strings by raw price
+        self._format_cache = {}
+
+        # Prices and path of the last image written to disk
+        self._last_prices_key = None
+
+        logger.info("PriceDisplay initialized: %sx%s, %s rows", width, height, self.rows)
+
+    def _build_template(self):
+        """Build the blank price grid that every update is drawn on top of
+
+        Returns:
+            PIL.Image: Image with background, cell borders and row separators
+        """
+        template = Image.new('RGB', (self.width, self.height), self.colors['background'])
+        draw = ImageDraw.Draw(template)
+
+        for row in range(self.rows):
+            y_start = row * self.row_height
+            y_end = (row + 1) * self.row_height
+
+            # Draw left and right cell borders
+            for x in (0, self.half_width):
+                draw.rectangle([x, y_start, x + self.half_width - 1, y_start + self.row_height - 1],
+                              outline=self.colors['border'], width=1)
+
+            # Draw horizontal separator line (except for last row)
+            if row < self.rows - 1:
+                separator_y = y_end - 1
+                draw.line([(0, separator_y), (self.width, separator_y)],
+                         fill=self.colors['border'], width=2)
+
+        return template
 
     def generate_price_image(self, prices, output_path="price_display.png"):
         """Generate PNG image with price layout
@@ -66,101 +122,129 @@ class PriceDisplay:
             str: Path to generated image file
         """
         if len(prices) != self.rows:
-            logger.warning(f"Expected {self.rows} prices, got {len(prices)}. Adjusting...")
+            logger.warning("Expected %s prices, got %s. Adjusting...", self.rows, len(prices))
             # Pad or truncate to match expected rows
             if len(prices) < self.rows:
                 prices.extend(["0"] * (self.rows - len(prices)))
             else:
                 prices = prices[:self.rows]
 
-        # Create new image with black background
-        image = Image.new('RGB', (self.width, self.height), self.colors['background'])
-        draw = ImageDraw.Draw(image)
+        # Reuse the last image if nothing changed since it was written
+        prices_key = (tuple(prices), output_path)
+        if prices_key == self._last_prices_key and os.path.exists(output_path):
+            logger.info("Prices unchanged, reusing image: %s", output_path)
+            return output_path
+
+        # Format every price up front
+        formatted_prices = [self._format_price(price) for price in prices]
+
+        # Start from the pre-rendered grid
+        image = self._template.copy()
 
         # Draw each price row
         for row in range(self.rows):
-            price = prices[row]
+            row_mask = self._row_cache(formatted_prices[row])
             y_start = row * self.row_height
-            y_end = (row + 1) * self.row_height
 
-            # Draw left side
-            self._draw_price_cell(draw, price, 0, y_start, self.half_width, self.row_height)
-
-            # Draw right side (duplicate)
-            self._draw_price_cell(draw, price, self.half_width, y_start, self.half_width, self.row_height)
-
-            # Draw horizontal separator line (except for last row)
-            if row < self.rows - 1:
-                separator_y = y_end - 1
-                draw.line([(0, separator_y), (self.width, separator_y)],
-                         fill=self.colors['border'], width=2)
+            # Draw both sides of the row in a single paste
+            image.paste(self.colors['text'], (0, y_start), row_mask)
 
         # Save the image
         try:
-            image.save(output_path, 'PNG')
-            logger.info(f"Price display image saved to: {output_path}")
+            # The image is consumed locally right away, so favour encode speed
+            # over file size (BMP output skips compression entirely)
+            if output_path.lower().endswith('.bmp'):
+                image.save(output_path, 'BMP')
+            else:
+                image.save(output_path, 'PNG', compress_level=1, optimize=False)
+            self._last_prices_key = prices_key
+            logger.info("Price display image saved to: %s", output_path)
             return output_path
         except Exception as e:
-            logger.error(f"Failed to save price image: {str(e)}")
+            logger.error("Failed to save price image: %s", e)
+            self._last_prices_key = None
             return None
 
-    def _draw_price_cell(self, draw, price, x, y, width, height):
-        """Draw a single price cell with left/right duplication
+    def _format_price(self, price):
+        """Format a price with dots for thousands (European style)
 
         Args:
-            draw: PIL ImageDraw object
-            price: Price string to display
-            x, y: Top-left coordinates
-            width, height: Cell dimensions
+            price: Price string to format
+
+        Returns:
+            str: Formatted price, or the original string if it isn't numeric
         """
-        # Add minimal padding for maximum text size
-        padding = 5
-        text_x = x + padding
-        text_y = y + padding
-        text_width = width - (2 * padding)
-        text_height = height - (2 * padding)
+        formatted_price = self._format_cache.get(price)
+        if formatted_price is not None:
+            return formatted_price
 
-        # Format price with dots for thousands (European style)
         try:
             # Add dots for thousands (European format)
             numeric_price = int(price)
             # Format with commas first, then replace with dots
             formatted_price = f"{numeric_price:,}".replace(",", ".")
-        except:
+        except (TypeError, ValueError):
             formatted_price = price
 
-        # Calculate font size to fit the cell
-        font_size = self._calculate_font_size(formatted_price, text_width, text_height)
-        try:
-            cell_font = ImageFont.truetype("arialblk.ttf", font_size)
-        except:
-            try:
-                cell_font = ImageFont.truetype("arialbd.ttf", font_size)
-            except:
-                try:
-                    cell_font = ImageFont.truetype("arial.ttf", font_size)
-                except:
-                    cell_font = self.font
-
-        # Get text bounding box
-        bbox = draw.textbbox((0, 0), formatted_price, font=cell_font)
+        # Keep the cache bounded; the set of live prices is small
+        if len(self._format_cache) >= 256:
+            self._format_cache.clear()
+        self._format_cache[price] = formatted_price
+        return formatted_price
+
+    def _render_row(self, formatted_price):
+        """Render a full price row (left cell and right duplicate) as a paste mask
+
+        Args:
+            formatted_price: Formatted price string to display
+
+        Returns:
+            PIL.Image: 'L' mode mask spanning the full display width
+        """
+        cell_mask = self._cell_cache(formatted_price, self.half_width, self.row_height)
+        row_mask = Image.new('L', (self.width, self.row_height), 0)
+        row_mask.paste(cell_mask, (0, 0))
+        row_mask.paste(cell_mask, (self.half_width, 0))
+        return row_mask
+
+    def _render_cell(self, formatted_price, width, height):
+        """Render the text of a single price cell as a paste mask
+
+        Args:
+            formatted_price: Formatted price string to display
+            width, height: Cell dimensions
+
+        Returns:
+            PIL.Image: 'L' mode mask with the centered text
+        """
+        # Add minimal padding for maximum text size
+        padding = 5
+        text_width = width - (2 * padding)
+        text_height = height - (2 * padding)
+
+        mask = Image.new('L', (width, height), 0)
+        draw = ImageDraw.Draw(mask)
+
+        # Calculate font size to fit the cell, reusing the bounding box
+        # measured while sizing instead of measuring the text again
+        font_size, bbox = self._fit_font_size(formatted_price, text_width, text_height)
+        cell_font = _load_font(font_size)
+
         text_width_actual = bbox[2] - bbox[0]
         text_height_actual = bbox[3] - bbox[1]
 
         # Center the text in the cell
-        text_x_centered = x + (width - text_width_actual) // 2
-        text_y_centered = y + height // 2 - (bbox[1] + bbox[3]) // 2
+        text_x_centered = (width - text_width_actual) // 2
+        text_y_centered = height // 2 - (bbox[1] + bbox[3]) // 2
 
         # Draw main text (no shadow for cleaner look)
         draw.text((text_x_centered, text_y_centered),
-                  formatted_price, font=cell_font, fill=self.colors['text'])
+                  formatted_price, font=cell_font, fill=255)
 
-        # Draw cell border
-        draw.rectangle([x, y, x + width - 1, y + height - 1],
-                      outline=self.colors['border'], width=1)
+        return mask
 
-    def _calculate_font_size(self, text, max_width, max_height):
-        """Calculate optimal font size to fit text in given dimensions
+    def _fit_font_size(self, text, max_width, max_height):
+        """Find the largest font size that fits, along with its text bounding box
 
         Args:
             text: Text to fit
@@ -168,33 +252,30 @@ class PriceDisplay:
             max_height: Maximum height in pixels
 
         Returns:
-            int: Optimal font size
+            tuple: (font size, bounding box of the text at that size)
         """
-        font_size = 24  # Start larger for better performance
+        min_font_size = 12
         max_font_size = 150  # Larger maximum for taller text on LED display
 
-        while font_size < max_font_size:
-            try:
-                test_font = ImageFont.truetype("arialblk.ttf", font_size)
-            except:
-                try:
-                    test_font = ImageFont.truetype("arialbd.ttf", font_size)
-                except:
-                    try:
-                        test_font = ImageFont.truetype("arial.ttf", font_size)
-                    except:
-                        test_font = self.font
-
-            bbox = test_font.getbbox(text)
+        # Text size grows with font size, so binary search for the largest fit
+        low, high = min_font_size, max_font_size
+        low_bbox = None
+        while low < high:
+            mid = (low + high + 1) // 2
+            bbox = _load_font(mid).getbbox(text)
             text_width = bbox[2] - bbox[0]
             text_height = bbox[3] - bbox[1]
 
-            if text_width > max_width or text_height > max_height:
-                return max(12, font_size - 2)  # Step back if too big
+            if text_width <= max_width and text_height <= max_height:
+                low, low_bbox = mid, bbox
+            else:
+                high = mid - 1
 
-            font_size += 2
+        # Only measured here if even the minimum size didn't fit
+        if low_bbox is None:
+            low_bbox = _load_font(low).getbbox(text)
 
-        return min(font_size, max_font_size)
+        return low, low_bbox
 
     def update_display(self, prices, output_path="price_display.png"):
         """Update the price display with new prices
@@ -206,7 +287,7 @@ class PriceDisplay:
         Returns:
             str: Path to updated image file
         """
-        logger.info(f"Updating price display with {len(prices)} prices: {prices}")
+        logger.info("Updating price display with %s prices: %s", len(prices), prices)
         return self.generate_price_image(prices, output_path)
 
 # Example usage and testing
@@ -3,6 +3,7 @@ UI Manager Module for LED Wall Client
 Handles window interactions and hotkeys
 """
 import os
+import time
 import logging
 import platform
 import subprocess
@@ -10,6 +11,17 @@ import threading
 
 logger = logging.getLogger("led_client.ui")
 
+# Win32 constants for the low-level keyboard hook
+WH_KEYBOARD_LL = 13
+HC_ACTION = 0
+WM_KEYDOWN = 0x0100
+WM_SYSKEYDOWN = 0x0104
+VK_CONTROL = 0x11
+VK_H = 0x48
+
+# Ignore toggles that arrive faster than this (e.g. keyboard autorepeat)
+TOGGLE_DEBOUNCE = 0.25  # seconds
+
 class UIManager:
     """Manages UI interactions like hotkeys and window visibility"""
     
@@ -23,35 +35,100 @@ class UIManager:
         self.is_windows = platform.system() == "Windows"
         self.is_raspberry_pi = self.player.is_raspberry_pi
         self.player_hidden = False
+        self._hook_proc = None
+        self._last_toggle = 0.0
+        self._toggle_lock = threading.Lock()
         self._setup_hotkeys()
     
     def _setup_hotkeys(self):
         """Set up hotkeys based on platform"""
         if self.is_windows:
-            try:
-                # Only import keyboard on Windows
-                import keyboard
-                keyboard.add_hotkey('ctrl+h', self.toggle_visibility)
-                logger.info("Registered Ctrl+H hotkey to toggle player visibility")
-            except ImportError:
-                logger.warning("Keyboard module not available. Hotkey functionality disabled.")
-            except Exception as e:
-                logger.error(f"Failed to register hotkey: {str(e)}")
+            # Low-level hooks are delivered through the installing thread's
+            # message loop, so install the hook on a dedicated thread
+            hook_thread = threading.Thread(target=self._run_keyboard_hook)
+            hook_thread.daemon = True
+            hook_thread.start()
         else:
             # For Linux/RPi we could set up other hotkey mechanisms here
             if self.is_raspberry_pi and 'DISPLAY' in os.environ:
                 logger.info("Running on Raspberry Pi with X11, hotkeys not automatically configured")
                 # Could use xbindkeys or similar for RPi
     
+    def _run_keyboard_hook(self):
+        """Install a WH_KEYBOARD_LL hook for Ctrl+H and pump its messages (Windows only)"""
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            user32 = ctypes.WinDLL('user32', use_last_error=True)
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+
+            class KBDLLHOOKSTRUCT(ctypes.Structure):
+                _fields_ = [
+                    ('vkCode', wintypes.DWORD),
+                    ('scanCode', wintypes.DWORD),
+                    ('flags', wintypes.DWORD),
+                    ('time', wintypes.DWORD),
+                    ('dwExtraInfo', ctypes.c_size_t)
+                ]
+
+            HOOKPROC = ctypes.WINFUNCTYPE(wintypes.LPARAM, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+            user32.SetWindowsHookExW.argtypes = [ctypes.c_int, HOOKPROC, wintypes.HINSTANCE, wintypes.DWORD]
+            user32.SetWindowsHookExW.restype = wintypes.HHOOK
+            user32.CallNextHookEx.argtypes = [wintypes.HHOOK, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM]
+            user32.CallNextHookEx.restype = wintypes.LPARAM
+            user32.GetAsyncKeyState.argtypes = [ctypes.c_int]
+            user32.GetAsyncKeyState.restype = wintypes.SHORT
+            user32.GetMessageW.argtypes = [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT]
+            user32.GetMessageW.restype = wintypes.BOOL
+            user32.UnhookWindowsHookEx.argtypes = [wintypes.HHOOK]
+            kernel32.GetModuleHandleW.argtypes = [wintypes.LPCWSTR]
+            kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+            def keyboard_proc(n_code, w_param, l_param):
+                if n_code == HC_ACTION and w_param in (WM_KEYDOWN, WM_SYSKEYDOWN):
+                    key = ctypes.cast(l_param, ctypes.POINTER(KBDLLHOOKSTRUCT)).contents
+                    if key.vkCode == VK_H and user32.GetAsyncKeyState(VK_CONTROL) & 0x8000:
+                        # Toggle off the hook thread so the hook chain isn't blocked
+                        toggle_thread = threading.Thread(target=self.toggle_visibility)
+                        toggle_thread.daemon = True
+                        toggle_thread.start()
+                return user32.CallNextHookEx(None, n_code, w_param, l_param)
+
+            # Keep a reference so the callback isn't garbage collected
+            self._hook_proc = HOOKPROC(keyboard_proc)
+            hook = user32.SetWindowsHookExW(WH_KEYBOARD_LL, self._hook_proc, kernel32.GetModuleHandleW(None), 0)
+            if not hook:
+                logger.error("Failed to register hotkey: error %s", ctypes.get_last_error())
+                return
+
+            logger.info("Registered Ctrl+H hotkey to toggle player visibility")
+
+            # Pump messages so the hook callback is delivered
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+
+            user32.UnhookWindowsHookEx(hook)
+        except Exception as e:
+            logger.error("Failed to register hotkey: %s", e)
+    
     def toggle_visibility(self):
         """Toggle player window visibility"""
-        self.player_hidden = not self.player_hidden
-        logger.info(f"Player visibility toggled: {'hidden' if self.player_hidden else 'visible'}")
-        
-        if self.player_hidden:
-            self.hide_player()
-        else:
-            self.show_player()
+        with self._toggle_lock:
+            now = time.monotonic()
+            if now - self._last_toggle < TOGGLE_DEBOUNCE:
+                return
+            self._last_toggle = now
+            
+            self.player_hidden = not self.player_hidden
+            logger.info("Player visibility toggled: %s", 'hidden' if self.player_hidden else 'visible')
+            
+            if self.player_hidden:
+                self.hide_player()
+            else:
+                self.show_player()
     
     def hide_player(self):
         """Hide the player window"""
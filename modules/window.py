@@ -0,0 +1,129 @@
+"""
+Window Module for LED Wall Client
+Positions, hides and shows the player window in-process through user32 on
+Windows instead of spawning helper processes
+"""
+import time
+import logging
+import platform
+
+logger = logging.getLogger("led_client.window")
+
+# Title given to the ffplay window via -window_title
+WINDOW_TITLE = 'LEDWallPlayer'
+
+# Win32 constants
+HWND_TOPMOST = -1
+SWP_SHOWWINDOW = 0x0040
+SW_MINIMIZE = 2
+SW_RESTORE = 9
+
+class WindowController:
+    """Finds and manipulates the player window using user32 (Windows only)"""
+
+    def __init__(self, title=WINDOW_TITLE):
+        """Initialize the window controller
+
+        Args:
+            title: Title of the window to control
+        """
+        self.title = title
+        self.is_windows = platform.system() == "Windows"
+        self._user32 = self._load_user32() if self.is_windows else None
+
+    @property
+    def available(self):
+        """Check if native window control is available on this platform"""
+        return self._user32 is not None
+
+    def find_window(self):
+        """Find the player window
+
+        Returns:
+            Native window handle, or None if the window doesn't exist
+        """
+        if self._user32 is None:
+            return None
+        return self._user32.FindWindowW(None, self.title) or None
+
+    def wait_for_window(self, timeout=2.0):
+        """Wait for the player window to appear
+
+        Polls with exponential backoff (1ms, 2ms, 4ms, ...) since the window
+        usually appears well within the first 100ms.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            Native window handle, or None if it didn't appear in time
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while True:
+            window = self.find_window()
+            remaining = deadline - time.monotonic()
+            if window or remaining <= 0:
+                return window
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.25)
+
+    def position(self, width, height, window=None):
+        """Move the player window to 0,0 and bring it to the top
+
+        Args:
+            width: Window width in pixels
+            height: Window height in pixels
+            window: Window handle, looked up if not given
+
+        Returns:
+            bool: True if the window was positioned
+        """
+        window = window or self.find_window()
+        if not window:
+            return False
+
+        self._user32.SetWindowPos(window, HWND_TOPMOST, 0, 0, width, height, SWP_SHOWWINDOW)
+        return True
+
+    def minimize(self):
+        """Minimize the player window
+
+        Returns:
+            bool: True if the window was found
+        """
+        window = self.find_window()
+        if not window:
+            return False
+
+        self._user32.ShowWindowAsync(window, SW_MINIMIZE)
+        return True
+
+    def restore(self):
+        """Restore and activate the player window
+
+        Returns:
+            bool: True if the window was found
+        """
+        window = self.find_window()
+        if not window:
+            return False
+
+        self._user32.ShowWindowAsync(window, SW_RESTORE)
+        return True
+
+    @staticmethod
+    def _load_user32():
+        """Load user32 with explicit signatures so handles are pointer-sized"""
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.WinDLL('user32')
+        user32.FindWindowW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR]
+        user32.FindWindowW.restype = wintypes.HWND
+        user32.SetWindowPos.argtypes = [wintypes.HWND, wintypes.HWND, ctypes.c_int, ctypes.c_int,
+                                        ctypes.c_int, ctypes.c_int, wintypes.UINT]
+        user32.SetWindowPos.restype = wintypes.BOOL
+        user32.ShowWindowAsync.argtypes = [wintypes.HWND, ctypes.c_int]
+        user32.ShowWindowAsync.restype = wintypes.BOOL
+        return user32